@@ -1,10 +1,14 @@
 import streamlit as st
 import sqlite3
-from datetime import date, timedelta
+import csv
+import io
+import json
+from datetime import date, datetime, timedelta
 from dataclasses import dataclass, asdict
 import re
-import uuid
-import pandas as pd
+import secrets
+import threading
+from zoneinfo import ZoneInfo
 
 # -----------------------------
 # App Setup
@@ -15,25 +19,22 @@ st.set_page_config(
     layout="wide",
 )
 
-# Minimal brand styling
-st.markdown(
-    """
-    <style>
-      .hero {
-        padding: 2.2rem 1rem; border-radius: 1.25rem; 
-        background: linear-gradient(135deg,#ffd6a5, #fff3b0);
-        border: 1px solid #ffecb3; box-shadow: 0 6px 24px rgba(0,0,0,0.08);
-      }
-      .hero h1 {margin: 0; font-size: 2.1rem}
-      .subtle {color: #333; opacity: 0.85}
-      .card {border: 1px solid #eee; border-radius: 1rem; padding: 1rem; height: 100%;}
-      .pill {display:inline-block;padding:.25rem .6rem;border-radius:999px;background:#111;color:#fff;font-size:.75rem}
-      .price {font-weight:800;font-size:1.8rem}
-      .muted {color:#666}
-    </style>
-    """,
-    unsafe_allow_html=True,
-)
+# Minimal brand styling, emitted together with the hero below
+_CSS = """
+<style>
+  .hero {
+    padding: 2.2rem 1rem; border-radius: 1.25rem; 
+    background: linear-gradient(135deg,#ffd6a5, #fff3b0);
+    border: 1px solid #ffecb3; box-shadow: 0 6px 24px rgba(0,0,0,0.08);
+  }
+  .hero h1 {margin: 0; font-size: 2.1rem}
+  .subtle {color: #333; opacity: 0.85}
+  .card {border: 1px solid #eee; border-radius: 1rem; padding: 1rem; height: 100%;}
+  .pill {display:inline-block;padding:.25rem .6rem;border-radius:999px;background:#111;color:#fff;font-size:.75rem}
+  .price {font-weight:800;font-size:1.8rem}
+  .muted {color:#666}
+</style>
+"""
 
 # -----------------------------
 # Data & Pricing
@@ -63,10 +64,16 @@ PACKAGES = {
 ADD_ONS = {
     "Airport Pickup (One-way)": 0,
     "Temple Darshan Guide": 0,
-    # "Breakfast Buffet (per guest per night)": 299,
+    # "Breakfast Buffet (per guest per night)": 299,  # needs per-guest/night pricing in calc_price
 }
 
-TAX_RATE = 0.12  # 12% GST placeholder
+_PKG_KEYS = tuple(PACKAGES)
+_PKG_INDEX = {k: i for i, k in enumerate(_PKG_KEYS)}
+_ADDON_KEYS = tuple(ADD_ONS)
+
+TAX_PCT = 12  # 12% GST placeholder
+
+HOTEL_TZ = ZoneInfo("Asia/Kolkata")
 
 # -----------------------------
 # Database Utilities
@@ -94,16 +101,41 @@ CREATE TABLE IF NOT EXISTS bookings (
   pay_status TEXT NOT NULL,
   notes TEXT
 );
+CREATE INDEX IF NOT EXISTS idx_bookings_email_id ON bookings(email, id DESC);
 """
 
+BOOKING_COLS = (
+    "created_at", "ref", "name", "email", "phone", "package", "check_in", "check_out", "nights",
+    "guests", "addons", "subtotal", "tax", "total", "pay_option", "pay_status", "notes",
+)
+INSERT_BOOKING = (
+    f"INSERT INTO bookings ({', '.join(BOOKING_COLS)}) VALUES ({', '.join('?' * len(BOOKING_COLS))})"
+)
+
 
+@st.cache_resource
 def get_conn():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+    # One shared connection per process; autocommit, WAL for concurrent readers
+    con = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("PRAGMA synchronous=NORMAL")
+    con.execute("PRAGMA temp_store=memory")
+    con.execute("PRAGMA cache_size=-64000")
+    return con
+
+
+@st.cache_resource
+def get_write_lock():
+    return threading.Lock()
 
 
+@st.cache_resource
 def init_db():
-    with get_conn() as con:
-        con.execute(DDL)
+    # Runs the DDL once per process rather than on every script rerun
+    with get_write_lock():
+        get_conn().executescript(DDL)
+    return True
 
 
 init_db()
@@ -112,97 +144,117 @@ init_db()
 # Helpers
 # -----------------------------
 
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+_PHONE_RE = re.compile(r"^[0-9\-\+\s]{7,15}$")
+
+
 def valid_email(x: str) -> bool:
-    return re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", x or "") is not None
+    return bool(x) and _EMAIL_RE.match(x) is not None
 
 
 def valid_phone(x: str) -> bool:
-    return re.match(r"^[0-9\-\+\s]{7,15}$", x or "") is not None
+    return bool(x) and _PHONE_RE.match(x) is not None
+
+
+def bookings_csv(cols: list[str], rows) -> bytes:
+    # Encode straight into one bytes buffer instead of building a str and then encoding it
+    buf = io.BytesIO()
+    text = io.TextIOWrapper(buf, encoding="utf-8", newline="")
+    writer = csv.writer(text, lineterminator="\n")
+    writer.writerow(cols)
+    writer.writerows(rows)
+    text.flush()
+    text.detach()
+    return buf.getvalue()
 
 
 def nights_between(d1: date, d2: date) -> int:
     return max((d2 - d1).days, 0)
 
 
-def calc_price(pkg_name: str, nights: int, guests: int, addons: list[str]):
-    pkg = PACKAGES[pkg_name]
-    room_cost = pkg.per_night * max(nights, 1)
-    add_cost = 0
-    for a in addons:
-        if a == "Breakfast Buffet (per guest per night)":
-            add_cost += ADD_ONS[a] * guests * max(nights, 1)
-        else:
-            add_cost += ADD_ONS[a]
-    subtotal = room_cost + add_cost
-    tax = int(round(subtotal * TAX_RATE))
+@st.cache_data(max_entries=256)
+def calc_price(pkg_name: str, nights: int, guests: int, addons: tuple[str, ...]):
+    room_cost = PACKAGES[pkg_name].per_night * max(nights, 1)
+    # All current add-ons are flat-priced
+    subtotal = room_cost + sum(ADD_ONS[a] for a in addons)
+    tax = (subtotal * TAX_PCT + 50) // 100  # rounded in integer arithmetic
     total = subtotal + tax
     return subtotal, tax, total
 
 
-def create_booking(**kwargs):
-    with get_conn() as con:
-        cols = (
-            "created_at, ref, name, email, phone, package, check_in, check_out, nights, guests, addons, subtotal, tax, total, pay_option, pay_status, notes"
-        )
-        q = f"INSERT INTO bookings ({cols}) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)"
-        con.execute(
-            q,
-            (
-                kwargs["created_at"],
-                kwargs["ref"],
-                kwargs["name"],
-                kwargs["email"],
-                kwargs["phone"],
-                kwargs["package"],
-                kwargs["check_in"],
-                kwargs["check_out"],
-                kwargs["nights"],
-                kwargs["guests"],
-                ", ".join(kwargs.get("addons", [])),
-                kwargs["subtotal"],
-                kwargs["tax"],
-                kwargs["total"],
-                kwargs["pay_option"],
-                kwargs["pay_status"],
-                kwargs.get("notes", ""),
-            ),
-        )
-        con.commit()
+def _booking_row(b: dict) -> tuple:
+    return (
+        b["created_at"],
+        b["ref"],
+        b["name"],
+        b["email"],
+        b["phone"],
+        b["package"],
+        b["check_in"],
+        b["check_out"],
+        b["nights"],
+        b["guests"],
+        json.dumps(b.get("addons", []), separators=(",", ":")),
+        b["subtotal"],
+        b["tax"],
+        b["total"],
+        b["pay_option"],
+        b["pay_status"],
+        b.get("notes", ""),
+    )
+
+
+def create_booking(bookings: dict | list[dict]):
+    if isinstance(bookings, dict):
+        bookings = [bookings]
+    rows = [_booking_row(b) for b in bookings]
+    con = get_conn()
+    with get_write_lock(), con:
+        con.execute("BEGIN")
+        con.executemany(INSERT_BOOKING, rows)
+
+
+def _load_addons(raw: str | None) -> list[str]:
+    if not raw:
+        return []
+    if raw.startswith("["):
+        return json.loads(raw)
+    return raw.split(", ")  # legacy comma-joined rows
 
 
 def find_booking(email: str, ref: str | None = None):
-    with get_conn() as con:
-        if ref:
-            cur = con.execute(
-                "SELECT * FROM bookings WHERE email = ? AND ref = ? ORDER BY id DESC LIMIT 1",
-                (email, ref),
-            )
-        else:
-            cur = con.execute(
-                "SELECT * FROM bookings WHERE email = ? ORDER BY id DESC LIMIT 1",
-                (email,),
-            )
-        row = cur.fetchone()
-        if not row:
-            return None
-        cols = [d[0] for d in cur.description]
-        return dict(zip(cols, row))
+    con = get_conn()
+    if ref:
+        cur = con.execute(
+            "SELECT * FROM bookings WHERE email = ? AND ref = ? ORDER BY id DESC LIMIT 1",
+            (email, ref),
+        )
+    else:
+        cur = con.execute(
+            "SELECT * FROM bookings WHERE email = ? ORDER BY id DESC LIMIT 1",
+            (email,),
+        )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    res = dict(row)
+    res["addons"] = _load_addons(res["addons"])
+    return res
 
 
 # -----------------------------
 # UI – Hero
 # -----------------------------
+_HERO = """
+<div class="hero">
+  <span class="pill">Amber Palace, Ayodhya</span>
+  <h1>Book your Ayodhya getaway</h1>
+  <p class="subtle">Choose Eco or Prime. Reserve now and pay later—simple, fast, and flexible.</p>
+</div>
+"""
+
 with st.container():
-    st.markdown(
-        """
-        <div class="hero">
-          <span class="pill">Amber Palace, Ayodhya</span>
-          <h1>Book your Ayodhya getaway</h1>
-          <p class="subtle">Choose Eco or Prime. Reserve now and pay later—simple, fast, and flexible.</p>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_CSS + _HERO, unsafe_allow_html=True)
 
 st.write("")
 
@@ -237,6 +289,18 @@ st.divider()
 # -----------------------------
 # Booking Tabs
 # -----------------------------
+def _render_price(package: str, nights: int, addons: list[str], subtotal: int, tax: int, total: int):
+    with st.expander("Price details", expanded=True):
+        st.write(f"Nights: **{max(nights,1)}** @ ₹{PACKAGES[package].per_night:,}/night")
+        if addons:
+            st.write("Add‑ons:")
+            for a in addons:
+                st.write(f"• {a}: ₹{ADD_ONS[a]:,}")
+        st.write(f"Subtotal: **₹{subtotal:,}**")
+        st.write(f"Tax ({TAX_PCT}%): **₹{tax:,}**")
+        st.write(f"Total: **₹{total:,}**")
+
+
 book_tab, find_tab, admin_tab = st.tabs(["Book Now", "Find My Booking", "Admin"])
 
 with book_tab:
@@ -254,14 +318,14 @@ with book_tab:
             phone = st.text_input("Phone *")
             package = st.selectbox(
                 "Choose Package *",
-                list(PACKAGES.keys()),
-                index=list(PACKAGES.keys()).index(st.session_state.selected_package),
+                _PKG_KEYS,
+                index=_PKG_INDEX[st.session_state.selected_package],
             )
             guests = st.number_input("Guests *", min_value=1, max_value=8, value=2, step=1)
         with right:
             check_in = st.date_input("Check‑in *", value=default_in, min_value=today)
             check_out = st.date_input("Check‑out *", value=default_out, min_value=default_in + timedelta(days=1))
-            addons = st.multiselect("Add‑ons (optional)", list(ADD_ONS.keys()))
+            addons = st.multiselect("Add‑ons (optional)", _ADDON_KEYS)
             pay_option = st.radio(
                 "Payment Option *",
                 ["Pay Later (reserve now)", "Mark as Paid (test)"],
@@ -273,20 +337,9 @@ with book_tab:
         nights = nights_between(check_in, check_out)
         if nights <= 0:
             st.warning("Check‑out must be after check‑in.")
-        subtotal, tax, total = calc_price(package, nights or 1, guests, addons)
-
-        with st.expander("Price details", expanded=True):
-            st.write(f"Nights: **{max(nights,1)}** @ ₹{PACKAGES[package].per_night:,}/night")
-            if addons:
-                st.write("Add‑ons:")
-                for a in addons:
-                    if a == "Breakfast Buffet (per guest per night)":
-                        st.write(f"• {a}: ₹{ADD_ONS[a]:,} × {guests} guests × {max(nights,1)} nights")
-                    else:
-                        st.write(f"• {a}: ₹{ADD_ONS[a]:,}")
-            st.write(f"Subtotal: **₹{subtotal:,}**")
-            st.write(f"Tax (12%): **₹{tax:,}**")
-            st.write(f"Total: **₹{total:,}**")
+        subtotal, tax, total = calc_price(package, nights or 1, guests, tuple(addons))
+
+        _render_price(package, nights, addons, subtotal, tax, total)
 
         agree = st.checkbox("I agree to the hotel policies and pay‑later terms (hold valid 24 hours). *")
         submitted = st.form_submit_button("Confirm Reservation", type="primary")
@@ -295,9 +348,10 @@ with book_tab:
         errors = []
         if not name.strip():
             errors.append("Name is required.")
-        if not valid_email(email):
+        # Blank fields skip the regex entirely
+        if not email.strip() or not valid_email(email):
             errors.append("A valid email is required.")
-        if not valid_phone(phone):
+        if not phone.strip() or not valid_phone(phone):
             errors.append("A valid phone is required.")
         if nights <= 0:
             errors.append("Check‑out must be after check‑in.")
@@ -307,11 +361,11 @@ with book_tab:
         if errors:
             st.error("\n".join(errors))
         else:
-            ref = f"AP-{today.strftime('%y%m%d')}-{str(uuid.uuid4())[:8].upper()}"
+            ref = f"AP-{today:%y%m%d}-{secrets.token_hex(4).upper()}"
             pay_status = "Pay Later" if pay_option.startswith("Pay Later") else "Paid"
 
             record = dict(
-                created_at=str(pd.Timestamp.now(tz="Asia/Kolkata")),
+                created_at=str(datetime.now(HOTEL_TZ)),
                 ref=ref,
                 name=name.strip(),
                 email=email.strip().lower(),
@@ -330,7 +384,7 @@ with book_tab:
                 notes=notes.strip(),
             )
             try:
-                create_booking(**record)
+                create_booking(record)
                 st.success("Reservation confirmed! Your reference is " + ref)
                 with st.container(border=True):
                     st.markdown(f"**Guest:** {record['name']}  ")
@@ -366,7 +420,7 @@ with find_tab:
                     st.markdown(f"**Total:** ₹{res['total']:,}")
                     st.markdown(f"**Payment:** {res['pay_status']}")
                     if res.get('addons'):
-                        st.markdown(f"**Add‑ons:** {res['addons']}")
+                        st.markdown("**Add‑ons:**\n" + "\n".join(f"- {a}" for a in res['addons']))
                     if res.get('notes'):
                         st.markdown(f"**Notes:** {res['notes']}")
 
@@ -377,17 +431,24 @@ with admin_tab:
         if admin_pass != "admin123":
             st.error("Wrong password.")
         else:
-            with get_conn() as con:
-                try:
-                    df = pd.read_sql("SELECT * FROM bookings ORDER BY id DESC", con)
-                except Exception:
-                    df = pd.DataFrame()
-            if df.empty:
+            import pandas as pd  # deferred: only the admin view needs it
+
+            try:
+                cur = get_conn().execute("SELECT * FROM bookings ORDER BY id DESC")
+                cols = [d[0] for d in cur.description]
+                rows = cur.fetchall()
+            except Exception:
+                cols, rows = [], []
+            if not rows:
                 st.info("No reservations yet.")
             else:
-                st.dataframe(df, use_container_width=True)
-                csv = df.to_csv(index=False).encode()
-                st.download_button("Download CSV", csv, file_name="amber_palace_bookings.csv", mime="text/csv")
+                st.dataframe(pd.DataFrame.from_records(rows, columns=cols), use_container_width=True)
+                st.download_button(
+                    "Download CSV",
+                    bookings_csv(cols, rows),
+                    file_name="amber_palace_bookings.csv",
+                    mime="text/csv",
+                )
 
 # Footer
 st.markdown("---")